@@ -0,0 +1,34 @@
+import re
+
+
+IGNORED_ADDRESS_WORDS = {'г', 'город', 'россия'}
+
+ADDRESS_ABBREVIATIONS = {
+    'обл': 'область',
+    'р-н': 'район',
+    'пос': 'поселок',
+    'ул': 'улица',
+    'пр': 'проспект',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'наб': 'набережная',
+    'ш': 'шоссе',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+
+def normalize_address(address):
+    address = address.casefold().replace('ё', 'е')
+    words = [word.strip('-') for word in re.findall(r'[\w-]+', address)]
+    return ' '.join(
+        ADDRESS_ABBREVIATIONS.get(word, word) for word in words
+        if word and word not in IGNORED_ADDRESS_WORDS
+    )
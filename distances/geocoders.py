@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from distances.addresses import normalize_address
+
+
+logger = logging.getLogger(__name__)
+
+
+class GeocoderUnavailable(requests.RequestException):
+    pass
+
+
+class GeocoderStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests_count = 0
+        self.errors_count = 0
+        self.total_latency = 0
+
+    def record(self, latency, failed):
+        with self.lock:
+            self.requests_count += 1
+            self.errors_count += failed
+            self.total_latency += latency
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'requests': self.requests_count,
+                'errors': self.errors_count,
+                'error_rate': self.errors_count / self.requests_count
+                if self.requests_count else 0,
+                'average_latency': self.total_latency / self.requests_count
+                if self.requests_count else 0,
+            }
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures_count = 0
+        self.opened_at = None
+
+    def check(self):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise GeocoderUnavailable('Geocoder circuit breaker is open')
+            self.opened_at = None
+            self.failures_count = self.failure_threshold - 1
+
+    def record_success(self):
+        with self.lock:
+            self.failures_count = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures_count += 1
+            if self.failures_count >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class YandexGeocoder:
+    base_url = "https://geocode-maps.yandex.ru/1.x"
+    retry_statuses = {429, 500, 502, 503, 504}
+
+    def __init__(self, apikey=None, timeout=(3, 5), retries=2,
+                 backoff=0.5, max_retry_delay=10, failure_threshold=5,
+                 reset_timeout=30):
+        self.apikey = apikey or settings.YANDEX_API_KEY
+        self.timeout = tuple(timeout) if isinstance(timeout, list) else timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_retry_delay = max_retry_delay
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = GeocoderStats()
+
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.GEOCODER_MAX_WORKERS
+        ))
+
+    def _get_retry_delay(self, attempt, response=None):
+        retry_after = response.headers.get('Retry-After') \
+            if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(int(retry_after), self.max_retry_delay)
+        return min(
+            self.backoff * 2 ** attempt * random.uniform(0.5, 1.5),
+            self.max_retry_delay
+        )
+
+    def _request(self, address):
+        started_at = time.monotonic()
+        failed = True
+        try:
+            response = self.session.get(self.base_url, params={
+                "geocode": address,
+                "apikey": self.apikey,
+                "format": "json",
+            }, timeout=self.timeout)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            latency = time.monotonic() - started_at
+            self.stats.record(latency, failed)
+            logger.debug('Geocoder answered in %.3f s', latency)
+
+    def _get(self, address):
+        for attempt in range(self.retries + 1):
+            self.circuit_breaker.check()
+            is_last_attempt = attempt == self.retries
+            try:
+                response = self._request(address)
+            except (requests.ConnectionError, requests.Timeout):
+                self.circuit_breaker.record_failure()
+                if is_last_attempt:
+                    raise
+                time.sleep(self._get_retry_delay(attempt))
+                continue
+
+            if response.status_code not in self.retry_statuses:
+                if not response.ok:
+                    self.circuit_breaker.record_failure()
+                    response.raise_for_status()
+                self.circuit_breaker.record_success()
+                return response
+
+            self.circuit_breaker.record_failure()
+            if is_last_attempt:
+                response.raise_for_status()
+            time.sleep(self._get_retry_delay(attempt, response))
+
+    def fetch_coordinates(self, address):
+        try:
+            response = self._get(address)
+        except requests.RequestException:
+            logger.warning(
+                'Geocoder request failed, stats: %s',
+                self.stats.as_dict()
+            )
+            raise
+
+        found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+
+        if not found_places:
+            return None
+
+        most_relevant = found_places[0]
+        lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
+        return float(lat), float(lon)
+
+
+class FixtureGeocoder:
+    def __init__(self, fixture_path, latency=0, error_rate=0, record=False,
+                 **recorder_options):
+        self.fixture_path = fixture_path
+        self.latency = latency
+        self.error_rate = error_rate
+        self.recorder = YandexGeocoder(**recorder_options) if record else None
+        self.stats = GeocoderStats()
+        self.lock = threading.Lock()
+
+        self.places = {}
+        if os.path.exists(fixture_path):
+            with open(fixture_path, encoding='utf-8') as fixture_file:
+                fixture = json.load(fixture_file)
+            self.places = {
+                normalize_address(address): place_coordinates
+                for address, place_coordinates in fixture.items()
+            }
+
+    def _save(self):
+        temporary_path = f'{self.fixture_path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as fixture_file:
+            json.dump(self.places, fixture_file, ensure_ascii=False, indent=4)
+        os.replace(temporary_path, self.fixture_path)
+
+    def _record(self, canonical_key, address):
+        place_coordinates = self.recorder.fetch_coordinates(address)
+        with self.lock:
+            self.places[canonical_key] = place_coordinates
+            self._save()
+        return place_coordinates
+
+    def fetch_coordinates(self, address):
+        started_at = time.monotonic()
+        if self.latency:
+            time.sleep(self.latency)
+        failed = random.random() < self.error_rate
+        self.stats.record(time.monotonic() - started_at, failed)
+        if failed:
+            raise requests.ConnectionError('Injected geocoder error')
+
+        canonical_key = normalize_address(address)
+        if canonical_key not in self.places and self.recorder:
+            return self._record(canonical_key, address)
+
+        place_coordinates = self.places.get(canonical_key)
+        if not place_coordinates:
+            return None
+        latitude, longitude = place_coordinates
+        return float(latitude), float(longitude)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from distances.services import get_stale_places, refresh_places, \
+    get_geocoder_stats
+
+
+class Command(BaseCommand):
+    help = 'Заново запрашивает у геокодера устаревшие и ненайденные адреса'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Сколько адресов обновлять за один проход',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Показать число запросов к геокодеру, долю ошибок '
+                 'и среднее время ответа',
+        )
+
+    def handle(self, *args, **options):
+        stale_places = get_stale_places().order_by('id')
+        last_id = 0
+        refreshed_count = 0
+        while True:
+            places = list(
+                stale_places.filter(id__gt=last_id)[:options['batch_size']]
+            )
+            if not places:
+                break
+            last_id = places[-1].id
+            refreshed_count += len(refresh_places(places))
+
+        self.stdout.write(f'Обновлено адресов: {refreshed_count}')
+        if options['stats']:
+            stats = get_geocoder_stats()
+            self.stdout.write(
+                f'Запросов к геокодеру: {stats["requests"]}, '
+                f'ошибок: {stats["errors"]} ({stats["error_rate"]:.1%}), '
+                f'среднее время ответа: {stats["average_latency"]:.3f} с'
+            )
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:18
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='place',
+            name='updated_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Последнее время обновления'),
+        ),
+    ]
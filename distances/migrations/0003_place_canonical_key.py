@@ -0,0 +1,96 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:40
+
+import re
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+IGNORED_ADDRESS_WORDS = {'г', 'город', 'россия'}
+
+ADDRESS_ABBREVIATIONS = {
+    'обл': 'область',
+    'р-н': 'район',
+    'пос': 'поселок',
+    'ул': 'улица',
+    'пр': 'проспект',
+    'пр-т': 'проспект',
+    'просп': 'проспект',
+    'пер': 'переулок',
+    'пл': 'площадь',
+    'наб': 'набережная',
+    'ш': 'шоссе',
+    'б-р': 'бульвар',
+    'бул': 'бульвар',
+    'д': 'дом',
+    'к': 'корпус',
+    'корп': 'корпус',
+    'стр': 'строение',
+    'кв': 'квартира',
+}
+
+
+def normalize_address(address):
+    address = address.casefold().replace('ё', 'е')
+    words = [word.strip('-') for word in re.findall(r'[\w-]+', address)]
+    return ' '.join(
+        ADDRESS_ABBREVIATIONS.get(word, word) for word in words
+        if word and word not in IGNORED_ADDRESS_WORDS
+    )
+
+
+def merge_duplicate_places(apps, schema_editor):
+    Place = apps.get_model('distances', 'Place')
+    places = Place.objects.order_by(
+        F('latitude').desc(nulls_last=True),
+        '-updated_at',
+    )
+
+    seen_keys = set()
+    places_to_update = []
+    duplicate_ids = []
+    for place in places.iterator(chunk_size=2000):
+        canonical_key = normalize_address(place.address)
+        if canonical_key in seen_keys:
+            duplicate_ids.append(place.id)
+            continue
+
+        seen_keys.add(canonical_key)
+        place.canonical_key = canonical_key
+        places_to_update.append(place)
+
+    for first_id in range(0, len(duplicate_ids), 1000):
+        Place.objects.filter(
+            id__in=duplicate_ids[first_id:first_id + 1000]
+        ).delete()
+    Place.objects.bulk_update(
+        places_to_update,
+        ['canonical_key'],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0002_alter_place_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='canonical_key',
+            field=models.CharField(max_length=200, null=True, verbose_name='Нормализованный адрес'),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='address',
+            field=models.CharField(max_length=120, verbose_name='Адрес'),
+        ),
+        migrations.RunPython(merge_duplicate_places, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='place',
+            name='canonical_key',
+            field=models.CharField(max_length=200, unique=True, verbose_name='Нормализованный адрес'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:22
+
+import datetime
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def mark_rounded_places_stale(apps, schema_editor):
+    Place = apps.get_model('distances', 'Place')
+    Place.objects.filter(latitude__isnull=False).update(
+        updated_at=datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('distances', '0003_place_canonical_key'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='place',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-90), django.core.validators.MaxValueValidator(90)], verbose_name='Широта'),
+        ),
+        migrations.AlterField(
+            model_name='place',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(-180), django.core.validators.MaxValueValidator(180)], verbose_name='Долгота'),
+        ),
+        migrations.RunPython(
+            mark_rounded_places_stale,
+            migrations.RunPython.noop
+        ),
+    ]
@@ -6,28 +6,29 @@ from django.utils import timezone
 class Place(models.Model):
     address = models.CharField(
         max_length=120,
-        verbose_name='Адрес',
+        verbose_name='Адрес'
+    )
+    canonical_key = models.CharField(
+        max_length=200,
+        verbose_name='Нормализованный адрес',
         unique=True
     )
-    latitude = models.DecimalField(
+    latitude = models.FloatField(
         'Широта',
-        max_digits=9,
-        decimal_places=2,
         validators=[MinValueValidator(-90), MaxValueValidator(90)],
         blank=True,
         null=True
     )
-    longitude = models.DecimalField(
+    longitude = models.FloatField(
         'Долгота',
-        max_digits=9,
-        decimal_places=2,
         validators=[MinValueValidator(-180), MaxValueValidator(180)],
         blank=True,
         null=True
     )
     updated_at = models.DateTimeField(
         verbose_name='Последнее время обновления',
-        default=timezone.now
+        default=timezone.now,
+        db_index=True
     )
 
     def __str__(self):
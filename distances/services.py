@@ -1,38 +1,196 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
 import requests
 
 from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from distances.addresses import normalize_address
 from distances.models import Place
 
 
-def _fetch_coordinates(apikey, address):
-    base_url = "https://geocode-maps.yandex.ru/1.x"
-    response = requests.get(base_url, params={
-        "geocode": address,
-        "apikey": apikey,
-        "format": "json",
-    })
-    response.raise_for_status()
-    found_places = response.json()['response']['GeoObjectCollection']['featureMember']
+background_executor = ThreadPoolExecutor(
+    max_workers=settings.GEOCODER_MAX_WORKERS,
+    thread_name_prefix='geocoder'
+)
+pending_keys = set()
+pending_keys_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_geocoder():
+    geocoder_class = import_string(settings.GEOCODER_BACKEND)
+    return geocoder_class(**settings.GEOCODER_OPTIONS)
+
+
+def get_geocoder_stats():
+    return get_geocoder().stats.as_dict()
+
+
+def _try_fetch_coordinates(address):
+    try:
+        return get_geocoder().fetch_coordinates(address), True
+    except requests.RequestException:
+        return None, False
+
+
+def _geocode_addresses(addresses):
+    max_workers = min(settings.GEOCODER_MAX_WORKERS, len(addresses))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_try_fetch_coordinates, addresses)
+
+    return {
+        address: place_coordinates
+        for address, (place_coordinates, fetched) in zip(addresses, results)
+        if fetched
+    }
+
+
+def _set_place_coordinates(place, place_coordinates):
+    place.latitude, place.longitude = place_coordinates or (None, None)
+    place.updated_at = timezone.now()
+
+
+def get_stale_places():
+    now = timezone.now()
+    found_expired_at = now - timedelta(seconds=settings.GEOCODER_CACHE_TTL)
+    not_found_expired_at = now - timedelta(
+        seconds=settings.GEOCODER_NEGATIVE_CACHE_TTL
+    )
+    return Place.objects.filter(
+        Q(latitude__isnull=False, updated_at__lt=found_expired_at)
+        | Q(latitude__isnull=True, updated_at__lt=not_found_expired_at)
+    )
+
+
+def refresh_places(places):
+    if not places:
+        return []
+
+    geocoded_addresses = _geocode_addresses([place.address for place in places])
+    refreshed_places = []
+    for place in places:
+        if place.address in geocoded_addresses:
+            _set_place_coordinates(place, geocoded_addresses[place.address])
+        elif place.latitude is None:
+            place.updated_at = timezone.now()
+        else:
+            continue
+        refreshed_places.append(place)
+
+    Place.objects.bulk_update(
+        refreshed_places,
+        ['latitude', 'longitude', 'updated_at']
+    )
+    return refreshed_places
 
-    if not found_places:
-        return None
 
-    most_relevant = found_places[0]
-    lon, lat = most_relevant['GeoObject']['Point']['pos'].split(" ")
-    return lat, lon
+def _get_canonical_keys(addresses):
+    return {
+        address: normalize_address(address)
+        for address in addresses if address
+    }
+
+
+def _get_places_coordinates(canonical_keys):
+    return {
+        canonical_key: (latitude, longitude)
+        for canonical_key, latitude, longitude in Place.objects
+        .filter(canonical_key__in=set(canonical_keys))
+        .values_list('canonical_key', 'latitude', 'longitude')
+    }
+
+
+def get_coordinates_bulk(addresses):
+    canonical_keys = _get_canonical_keys(addresses)
+    key_coordinates = _get_places_coordinates(canonical_keys.values())
+
+    unknown_addresses = {}
+    for address, canonical_key in sorted(canonical_keys.items()):
+        if canonical_key not in key_coordinates:
+            unknown_addresses.setdefault(canonical_key, address)
+
+    if unknown_addresses:
+        geocoded_addresses = _geocode_addresses(
+            list(unknown_addresses.values())
+        )
+        fetched_places = []
+        for canonical_key, address in unknown_addresses.items():
+            place = Place(address=address, canonical_key=canonical_key)
+            _set_place_coordinates(place, geocoded_addresses.get(address))
+            fetched_places.append(place)
+
+        Place.objects.bulk_create(fetched_places, ignore_conflicts=True)
+        key_coordinates.update({
+            place.canonical_key: (place.latitude, place.longitude)
+            for place in fetched_places
+        })
+
+    return {
+        address: key_coordinates[canonical_key]
+        for address, canonical_key in canonical_keys.items()
+    }
+
+
+def get_known_coordinates(addresses):
+    canonical_keys = _get_canonical_keys(addresses)
+    key_coordinates = _get_places_coordinates(canonical_keys.values())
+
+    unknown_addresses = {}
+    for address, canonical_key in sorted(canonical_keys.items()):
+        if canonical_key not in key_coordinates:
+            unknown_addresses.setdefault(canonical_key, address)
+    if unknown_addresses:
+        _enqueue_geocoding(unknown_addresses)
+
+    known_coordinates = {
+        address: (None, None) for address in addresses if not address
+    }
+    known_coordinates.update({
+        address: key_coordinates[canonical_key]
+        for address, canonical_key in canonical_keys.items()
+        if canonical_key in key_coordinates
+    })
+    return known_coordinates
 
 
 def get_address_coordinates(address):
-    place, created = Place.objects.get_or_create(address=address)
+    return get_coordinates_bulk([address]).get(address, (None, None))
+
+
+def _get_coordinates_in_background(addresses):
+    try:
+        get_coordinates_bulk(addresses)
+    finally:
+        connection.close()
+
+
+def geocode_in_background(addresses):
+    return background_executor.submit(
+        _get_coordinates_in_background,
+        list(addresses)
+    )
+
 
-    if not created:
-        return place.latitude, place.longitude
+def _enqueue_geocoding(unknown_addresses):
+    with pending_keys_lock:
+        new_addresses = {
+            canonical_key: address
+            for canonical_key, address in unknown_addresses.items()
+            if canonical_key not in pending_keys
+        }
+        pending_keys.update(new_addresses)
+    if not new_addresses:
+        return
 
-    place_coordinates = _fetch_coordinates(settings.YANDEX_API_KEY, address)
-    if not place_coordinates:
-        return None
+    def release_keys(future):
+        with pending_keys_lock:
+            pending_keys.difference_update(new_addresses)
 
-    place.address = address
-    place.latitude, place.longitude = place_coordinates
-    place.save()
-    return place.latitude, place.longitude
+    geocode_in_background(new_addresses.values()) \
+        .add_done_callback(release_keys)
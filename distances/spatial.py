@@ -0,0 +1,60 @@
+import numpy as np
+from geopy import distance
+
+
+EARTH_RADIUS_KM = distance.EARTH_RADIUS
+
+
+def _to_unit_vectors(coordinates):
+    latitudes, longitudes = np.radians(coordinates).T
+    return np.column_stack([
+        np.cos(latitudes) * np.cos(longitudes),
+        np.cos(latitudes) * np.sin(longitudes),
+        np.sin(latitudes),
+    ])
+
+
+class SpatialIndex:
+    def __init__(self, keys, coordinates):
+        self.keys = list(keys)
+        self.coordinates = np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        self.points = _to_unit_vectors(self.coordinates)
+        self.positions = {
+            key: position for position, key in enumerate(self.keys)
+        }
+
+    def __contains__(self, key):
+        return key in self.positions
+
+    def _get_positions(self, allowed_keys):
+        if allowed_keys is None:
+            return np.arange(len(self.keys))
+        return np.array(
+            sorted(
+                self.positions[key] for key in allowed_keys
+                if key in self.positions
+            ),
+            dtype=int
+        )
+
+    def nearest(self, coordinates, k, allowed_keys=None):
+        positions = self._get_positions(allowed_keys)
+        if not len(positions) or k <= 0:
+            return []
+
+        point = _to_unit_vectors(
+            np.asarray(coordinates, dtype=float).reshape(-1, 2)
+        )[0]
+        chords = np.linalg.norm(self.points[positions] - point, axis=1)
+        if len(positions) > k:
+            nearest = np.argpartition(chords, k - 1)[:k]
+        else:
+            nearest = np.arange(len(positions))
+        nearest = nearest[np.argsort(chords[nearest])]
+
+        distances = 2 * EARTH_RADIUS_KM \
+            * np.arcsin(np.clip(chords[nearest] / 2, 0, 1))
+        return [
+            (self.keys[positions[row]], float(distance))
+            for row, distance in zip(nearest, distances)
+        ]
@@ -12,6 +12,7 @@ from .models import Restaurant
 from .models import RestaurantMenuItem
 from .models import Order
 from .models import ItemsInOrder
+from .models import Banner
 
 
 class RestaurantMenuItemInline(admin.TabularInline):
@@ -29,6 +30,13 @@ class OrderAdmin(admin.ModelAdmin):
     inlines = [
         OrderInline
     ]
+    readonly_fields = [
+        'total_price',
+    ]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        form.instance.update_total_price()
 
     def response_change(self, request, obj):
         redirect_to = super().response_change(request, obj)
@@ -136,3 +144,21 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(ProductCategory)
 class ProductAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(Banner)
+class BannerAdmin(admin.ModelAdmin):
+    list_display = [
+        'title',
+        'position',
+        'is_active',
+        'active_from',
+        'active_until',
+    ]
+    list_editable = [
+        'position',
+        'is_active',
+    ]
+    list_filter = [
+        'is_active',
+    ]
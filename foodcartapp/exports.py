@@ -0,0 +1,68 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ItemsInOrder
+
+
+EXPORT_FIELDS = {
+    'order_id': 'order_id',
+    'status': 'order__status',
+    'paid_status': 'order__paid_status',
+    'registered_at': 'order__registered_at',
+    'called_at': 'order__called_at',
+    'delivered_at': 'order__delivered_at',
+    'firstname': 'order__firstname',
+    'lastname': 'order__lastname',
+    'phonenumber': 'order__phonenumber',
+    'address': 'order__address',
+    'total_price': 'order__total_price',
+    'cooking_restaurant_id': 'order__cooking_restaurant_id',
+    'product_id': 'product_id',
+    'product_name': 'product__name',
+    'category_name': 'product__category__name',
+    'quantity': 'quantity',
+    'price': 'price',
+}
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def get_export_rows(date_from=None, date_to=None, statuses=None,
+                    chunk_size=2000):
+    items = ItemsInOrder.objects.order_by('order_id', 'id')
+    if date_from:
+        items = items.filter(order__registered_at__date__gte=date_from)
+    if date_to:
+        items = items.filter(order__registered_at__date__lte=date_to)
+    if statuses:
+        items = items.filter(order__status__in=statuses)
+
+    rows = items.values_list(*EXPORT_FIELDS.values()) \
+        .iterator(chunk_size=chunk_size)
+    for row in rows:
+        row = dict(zip(EXPORT_FIELDS, row))
+        row['phonenumber'] = str(row['phonenumber'])
+        yield row
+
+
+def iter_csv(rows):
+    writer = csv.DictWriter(Echo(), fieldnames=list(EXPORT_FIELDS))
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
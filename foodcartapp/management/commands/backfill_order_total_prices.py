@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from foodcartapp.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённую стоимость заказов по их позициям'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Сколько заказов обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        max_id = Order.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+        updated_orders = 0
+        for first_id in range(0, max_id + 1, chunk_size):
+            updated_orders += Order.objects \
+                .filter(id__gte=first_id, id__lt=first_id + chunk_size) \
+                .update_total_prices()
+
+        self.stdout.write(f'Обновлено заказов: {updated_orders}')
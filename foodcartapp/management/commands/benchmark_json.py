@@ -0,0 +1,70 @@
+import json
+import timeit
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from foodcartapp.renderers import dump_json_orjson, dump_json_stdlib, orjson
+
+
+def dump_json_pretty(data):
+    return json.dumps(
+        data,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        indent=4,
+    ).encode()
+
+
+def make_catalog(products_count):
+    return [
+        {
+            'id': product_id,
+            'name': f'Бургер №{product_id}',
+            'price': Decimal('299.00') + product_id,
+            'special_status': product_id % 5 == 0,
+            'description': 'Сочная котлета, свежие овощи и фирменный соус',
+            'category': {
+                'id': product_id % 7,
+                'name': 'Бургеры',
+            },
+            'image': f'/media/burger_{product_id}.jpg',
+            'restaurants': [
+                {
+                    'id': restaurant_id,
+                    'name': f'Star Burger №{restaurant_id}',
+                }
+                for restaurant_id in range(1, 4)
+            ]
+        }
+        for product_id in range(1, products_count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает размер и скорость сериализации каталога товаров в JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        catalog = make_catalog(options['products'])
+        encoders = {
+            'json, indent=4': dump_json_pretty,
+            'json, compact': dump_json_stdlib,
+        }
+        if orjson:
+            encoders['orjson'] = dump_json_orjson
+
+        for name, dump in encoders.items():
+            content_size = len(dump(catalog))
+            duration = timeit.timeit(
+                lambda: dump(catalog),
+                number=options['repeat']
+            )
+            self.stdout.write(
+                f'{name:>15}: {content_size:>8} байт, '
+                f'{duration / options["repeat"] * 1e6:>10.1f} мкс на ответ'
+            )
@@ -0,0 +1,113 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from foodcartapp.models import Product, Restaurant, RestaurantMenuItem
+
+
+MENU_ITEMS_TABLE = RestaurantMenuItem._meta.db_table
+AVAILABILITY_INDEX = 'menu_item_availability_idx'
+FULL_SCAN_MARKERS = [
+    f'Seq Scan on {MENU_ITEMS_TABLE}',
+    'LIST SUBQUERY',
+]
+
+
+def seed_catalog(products_count, restaurants_count, available_share,
+                 batch_size=10000):
+    products = Product.objects.bulk_create(
+        [
+            Product(
+                name=f'Benchmark {number}',
+                price=100,
+                image='benchmark.jpg'
+            )
+            for number in range(products_count)
+        ],
+        batch_size=batch_size
+    )
+    restaurants = Restaurant.objects.bulk_create(
+        [
+            Restaurant(name=f'Benchmark {number}')
+            for number in range(restaurants_count)
+        ],
+        batch_size=batch_size
+    )
+    if not connection.features.can_return_rows_from_bulk_insert:
+        products = Product.objects.filter(name__startswith='Benchmark')
+        restaurants = Restaurant.objects.filter(name__startswith='Benchmark')
+
+    menu_items = []
+    for restaurant in restaurants:
+        for product in products:
+            menu_items.append(RestaurantMenuItem(
+                restaurant=restaurant,
+                product=product,
+                availability=random.random() < available_share,
+            ))
+            if len(menu_items) == batch_size:
+                RestaurantMenuItem.objects.bulk_create(menu_items)
+                menu_items = []
+    RestaurantMenuItem.objects.bulk_create(menu_items)
+
+
+def has_full_menu_scan(plan):
+    if AVAILABILITY_INDEX not in plan:
+        return True
+    return any(marker in plan for marker in FULL_SCAN_MARKERS)
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает план запроса доступных товаров для каталога '
+        'и падает, если по меню ресторанов идёт полный проход. '
+        'Число запросов проверяют тесты foodcartapp. '
+        'Для проверки на большом каталоге PostgreSQL: '
+        '--seed-products 10000 --seed-restaurants 200'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-products',
+            type=int,
+            default=0,
+            help='Сколько тестовых товаров добавить перед проверкой. '
+                 'Они удаляются после проверки',
+        )
+        parser.add_argument(
+            '--seed-restaurants',
+            type=int,
+            default=0,
+            help='Сколько тестовых ресторанов добавить перед проверкой. '
+                 'В меню каждого будут все тестовые товары',
+        )
+        parser.add_argument(
+            '--available-share',
+            type=float,
+            default=0.3,
+            help='Доля пунктов меню, которые есть в продаже',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed_catalog(
+                options['seed_products'],
+                options['seed_restaurants'],
+                options['available_share'],
+            )
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {MENU_ITEMS_TABLE}')
+                    cursor.execute(f'ANALYZE {Product._meta.db_table}')
+
+            products = Product.objects.select_related('category').available()
+            plan = products.explain()
+            products_count = products.count()
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        self.stdout.write(f'Доступных товаров: {products_count}')
+        if has_full_menu_scan(plan):
+            raise CommandError('Меню ресторанов читается полным проходом')
+        self.stdout.write(self.style.SUCCESS('Полного прохода по меню нет'))
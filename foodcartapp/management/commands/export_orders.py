@@ -0,0 +1,70 @@
+import argparse
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from foodcartapp.exports import EXPORT_FORMATS, get_export_rows
+from foodcartapp.models import Order
+
+
+def parse_day(value):
+    day = parse_date(value)
+    if not day:
+        raise argparse.ArgumentTypeError(f'Некорректная дата {value}')
+    return day
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заказы с позициями в CSV или NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+        )
+        parser.add_argument(
+            '--date-from',
+            type=parse_day,
+            help='Первый день регистрации заказов, ГГГГ-ММ-ДД',
+        )
+        parser.add_argument(
+            '--date-to',
+            type=parse_day,
+            help='Последний день регистрации заказов, ГГГГ-ММ-ДД',
+        )
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=[status for status, _ in Order.ORDER_STATUS_CHOICES],
+            help='Статус заказов, можно указать несколько раз',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для выгрузки. По умолчанию выгрузка идёт в консоль',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+        )
+
+    def handle(self, *args, **options):
+        render_rows, _ = EXPORT_FORMATS[options['format']]
+        rows = get_export_rows(
+            date_from=options['date_from'],
+            date_to=options['date_to'],
+            statuses=options['status'],
+            chunk_size=options['chunk_size'],
+        )
+
+        output = sys.stdout
+        if options['output']:
+            output = open(options['output'], 'w', encoding='utf-8', newline='')
+        try:
+            for line in render_rows(rows):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0060_order_total_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='itemsinorder',
+            index=models.Index(fields=['order', 'product'], name='items_in_order_product_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['NP', 'IP', 'ID'])), fields=['status', 'registered_at'], name='order_not_completed_idx'),
+        ),
+    ]
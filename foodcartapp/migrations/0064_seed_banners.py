@@ -0,0 +1,41 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import migrations
+
+
+BANNERS = [
+    ('Burger', 'Tasty Burger at your door step', 'burger.jpg'),
+    ('Spices', 'All Cuisines', 'food.jpg'),
+    ('New York', 'Food is incomplete without a tasty dessert', 'tasty.jpg'),
+]
+
+
+def create_banners(apps, schema_editor):
+    Banner = apps.get_model('foodcartapp', 'Banner')
+    if Banner.objects.exists():
+        return
+
+    for position, (title, text, filename) in enumerate(BANNERS):
+        path = os.path.join(settings.BASE_DIR, 'assets', filename)
+        if not os.path.exists(path):
+            continue
+        banner = Banner(title=title, text=text, position=position)
+        if banner.image.storage.exists(filename):
+            banner.image.name = filename
+        else:
+            with open(path, 'rb') as image:
+                banner.image.save(filename, File(image), save=False)
+        banner.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0063_banner'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_banners, migrations.RunPython.noop),
+    ]
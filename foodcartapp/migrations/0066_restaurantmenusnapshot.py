@@ -0,0 +1,28 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0065_product_category_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RestaurantMenuSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField(verbose_name='меню в JSON')),
+                ('etag', models.CharField(max_length=32, verbose_name='хэш меню')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата сборки')),
+                ('restaurant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='menu_snapshot', to='foodcartapp.restaurant', verbose_name='ресторан')),
+            ],
+            options={
+                'verbose_name': 'снимок меню ресторана',
+                'verbose_name_plural': 'снимки меню ресторанов',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0066_restaurantmenusnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurantmenuitem',
+            index=models.Index(fields=['product', 'availability'], name='menu_item_availability_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+CHUNK_SIZE = 10000
+
+
+def backfill_total_prices(apps, schema_editor):
+    Order = apps.get_model('foodcartapp', 'Order')
+    ItemsInOrder = apps.get_model('foodcartapp', 'ItemsInOrder')
+
+    total_prices = ItemsInOrder.objects.filter(order=OuterRef('pk')) \
+        .values('order') \
+        .annotate(total_price=Sum(F('quantity') * F('price'))) \
+        .values('total_price')
+    total_price = Coalesce(
+        Subquery(total_prices, output_field=DecimalField()),
+        0,
+        output_field=DecimalField()
+    )
+
+    last_order = Order.objects.order_by('-id').first()
+    max_id = last_order.id if last_order else 0
+    for first_id in range(0, max_id + 1, CHUNK_SIZE):
+        Order.objects \
+            .filter(id__gte=first_id, id__lt=first_id + CHUNK_SIZE) \
+            .update(total_price=total_price)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodcartapp', '0067_menu_item_availability_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_total_prices, migrations.RunPython.noop),
+    ]
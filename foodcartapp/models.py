@@ -1,5 +1,6 @@
 from django.db import models
-from django.db.models import Sum, F
+from django.db.models import Sum, F, OuterRef, Subquery, DecimalField
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from phonenumber_field.modelfields import PhoneNumberField
 from django.utils import timezone
@@ -31,12 +32,11 @@ class Restaurant(models.Model):
 
 class ProductQuerySet(models.QuerySet):
     def available(self):
-        products = (
-            RestaurantMenuItem.objects
-            .filter(availability=True)
-            .values_list('product')
+        menu_items = RestaurantMenuItem.objects.filter(
+            product=models.OuterRef('pk'),
+            availability=True,
         )
-        return self.filter(pk__in=products)
+        return self.filter(models.Exists(menu_items))
 
 
 class ProductCategory(models.Model):
@@ -91,6 +91,12 @@ class Product(models.Model):
     class Meta:
         verbose_name = 'товар'
         verbose_name_plural = 'товары'
+        indexes = [
+            models.Index(
+                fields=['category', 'id'],
+                name='product_category_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -121,22 +127,132 @@ class RestaurantMenuItem(models.Model):
         unique_together = [
             ['restaurant', 'product']
         ]
+        indexes = [
+            models.Index(
+                fields=['product', 'availability'],
+                name='menu_item_availability_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.restaurant.name} - {self.product.name}"
 
 
+class RestaurantMenuSnapshot(models.Model):
+    restaurant = models.OneToOneField(
+        Restaurant,
+        verbose_name='ресторан',
+        related_name='menu_snapshot',
+        on_delete=models.CASCADE,
+    )
+    content = models.TextField(
+        'меню в JSON'
+    )
+    etag = models.CharField(
+        'хэш меню',
+        max_length=32
+    )
+    updated_at = models.DateTimeField(
+        'дата сборки',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'снимок меню ресторана'
+        verbose_name_plural = 'снимки меню ресторанов'
+
+    def __str__(self):
+        return f'Меню ресторана {self.restaurant_id}'
+
+
+class BannerQuerySet(models.QuerySet):
+    def active(self, moment):
+        return self.filter(
+            models.Q(active_from__isnull=True)
+            | models.Q(active_from__lte=moment),
+            models.Q(active_until__isnull=True)
+            | models.Q(active_until__gt=moment),
+            is_active=True,
+        )
+
+
+class Banner(models.Model):
+    title = models.CharField(
+        'заголовок',
+        max_length=50
+    )
+    text = models.CharField(
+        'текст',
+        max_length=200,
+        blank=True,
+    )
+    image = models.ImageField(
+        'картинка'
+    )
+    position = models.PositiveIntegerField(
+        'позиция',
+        default=0,
+        db_index=True,
+    )
+    is_active = models.BooleanField(
+        'показывать',
+        default=True,
+    )
+    active_from = models.DateTimeField(
+        'показывать с',
+        blank=True,
+        null=True,
+    )
+    active_until = models.DateTimeField(
+        'показывать до',
+        blank=True,
+        null=True,
+    )
+
+    objects = BannerQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'баннер'
+        verbose_name_plural = 'баннеры'
+        ordering = ['position', 'id']
+
+    def __str__(self):
+        return self.title
+
+
+ORDER_NOT_PROCESSED = 'NP'
+ORDER_IN_PROCESS = 'IP'
+ORDER_IN_DELIVERY = 'ID'
+NOT_COMPLETED_ORDER_STATUSES = [
+    ORDER_NOT_PROCESSED,
+    ORDER_IN_PROCESS,
+    ORDER_IN_DELIVERY,
+]
+
+
 class OrderQuerySet(models.QuerySet):
     def summary(self):
-        return self.annotate(
-            amount=Sum(F('items__quantity') * F('items__price'))
-        )
+        return self.annotate(amount=F('total_price'))
+
+    def not_completed(self):
+        return self.filter(status__in=NOT_COMPLETED_ORDER_STATUSES)
+
+    def update_total_prices(self):
+        total_prices = ItemsInOrder.objects.filter(order=OuterRef('pk')) \
+            .values('order') \
+            .annotate(total_price=Sum(F('quantity') * F('price'))) \
+            .values('total_price')
+        return self.update(total_price=Coalesce(
+            Subquery(total_prices, output_field=DecimalField()),
+            0,
+            output_field=DecimalField()
+        ))
 
 
 class Order(models.Model):
-    NOT_PROCESSED = 'NP'
-    IN_PROCESS = 'IP'
-    IN_DELIVERY = 'ID'
+    NOT_PROCESSED = ORDER_NOT_PROCESSED
+    IN_PROCESS = ORDER_IN_PROCESS
+    IN_DELIVERY = ORDER_IN_DELIVERY
     PROCESSED = 'OP'
     PAID_BY_CASH = 'CASH'
     PAID_BY_CARD = 'CARD'
@@ -153,6 +269,7 @@ class Order(models.Model):
         (PAID_BY_CARD, 'Интернет-эквайринг'),
         (PAID_NOT_CHOSEN, 'Не выбран')
     ]
+    NOT_COMPLETED_STATUSES = NOT_COMPLETED_ORDER_STATUSES
 
     status = models.CharField(
         max_length=30,
@@ -167,6 +284,13 @@ class Order(models.Model):
         choices=ORDER_PAID_STATUS_CHOICES,
         default=PAID_NOT_CHOSEN
     )
+    total_price = models.DecimalField(
+        'Стоимость заказа',
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        validators=[MinValueValidator(0)]
+    )
     cooking_restaurant = models.ForeignKey(
         'Restaurant',
         on_delete=models.CASCADE,
@@ -209,16 +333,34 @@ class Order(models.Model):
         blank=True,
         null=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения заказа',
+        auto_now=True,
+        db_index=True
+    )
 
     objects = OrderQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'заказ'
         verbose_name_plural = 'заказы'
+        indexes = [
+            models.Index(
+                fields=['status', 'registered_at'],
+                condition=models.Q(status__in=NOT_COMPLETED_ORDER_STATUSES),
+                name='order_not_completed_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.firstname} {self.lastname}, {self.address}"
 
+    def update_total_price(self):
+        self.total_price = self.items.aggregate(
+            total_price=Sum(F('quantity') * F('price'))
+        )['total_price'] or 0
+        self.save(update_fields=['total_price', 'updated_at'])
+
 
 class ItemsInOrder(models.Model):
     order = models.ForeignKey(
@@ -244,5 +386,13 @@ class ItemsInOrder(models.Model):
         validators=[MinValueValidator(0)]
     )
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['order', 'product'],
+                name='items_in_order_product_idx',
+            ),
+        ]
+
     def __str__(self):
         return f'Продукт {self.product.name} в количестве {self.quantity}'
@@ -0,0 +1,32 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+    max_items = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return []
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        try:
+            for line in codecs.getreader(encoding)(stream):
+                if not line.strip():
+                    continue
+                if self.max_items is not None \
+                        and len(items) >= self.max_items:
+                    raise ParseError(
+                        f'NDJSON parse error - more than {self.max_items} items'
+                    )
+                items.append(json.loads(line))
+        except ValueError as exc:
+            raise ParseError(f'NDJSON parse error - {exc}')
+        return items
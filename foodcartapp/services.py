@@ -0,0 +1,337 @@
+import hashlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from .models import Product, Restaurant, RestaurantMenuItem, \
+    RestaurantMenuSnapshot, Banner
+from .renderers import dump_json
+
+
+PRODUCT_CATALOG_CACHE_KEY = 'foodcartapp:product_catalog'
+BANNERS_VERSION_CACHE_KEY = 'foodcartapp:banners_version'
+BANNERS_CACHE_LIFETIME = 60
+
+banners_cache = {}
+
+
+def get_availability_index():
+    availability_index = defaultdict(set)
+    menu_items = RestaurantMenuItem.objects.filter(availability=True) \
+        .values_list('product_id', 'restaurant_id')
+    for product_id, restaurant_id in menu_items:
+        availability_index[product_id].add(restaurant_id)
+
+    return {
+        product_id: frozenset(restaurant_ids)
+        for product_id, restaurant_ids in availability_index.items()
+    }
+
+
+def find_available_restaurants(availability_index, product_ids):
+    restaurant_sets = sorted(
+        (availability_index.get(product_id, frozenset())
+         for product_id in set(product_ids)),
+        key=len
+    )
+    if not restaurant_sets:
+        return frozenset()
+
+    return frozenset.intersection(*restaurant_sets)
+
+
+PRODUCT_SERIALIZERS = {
+    'id': lambda product, restaurants: product.id,
+    'name': lambda product, restaurants: product.name,
+    'price': lambda product, restaurants: product.price,
+    'special_status': lambda product, restaurants: product.special_status,
+    'description': lambda product, restaurants: product.description,
+    'category': lambda product, restaurants: {
+        'id': product.category.id,
+        'name': product.category.name,
+    } if product.category else None,
+    'image': lambda product, restaurants: product.image.url,
+    'restaurants': lambda product, restaurants: restaurants.get(product.id, []),
+}
+PRODUCT_FIELDS = list(PRODUCT_SERIALIZERS)
+MENU_PRODUCT_FIELDS = [
+    field for field in PRODUCT_FIELDS if field != 'restaurants'
+]
+PRODUCT_COLUMNS = {
+    'id': [],
+    'name': ['name'],
+    'price': ['price'],
+    'special_status': ['special_status'],
+    'description': ['description'],
+    'category': ['category', 'category__name'],
+    'image': ['image'],
+    'restaurants': [],
+}
+PRODUCTS_PAGE_SIZE = 20
+PRODUCTS_MAX_PAGE_SIZE = 100
+
+
+def get_product_restaurants(product_ids=None):
+    menu_items = RestaurantMenuItem.objects.filter(availability=True)
+    if product_ids is not None:
+        menu_items = menu_items.filter(product_id__in=product_ids)
+    menu_items = menu_items.order_by('restaurant__name') \
+        .values_list('product_id', 'restaurant_id', 'restaurant__name')
+
+    product_restaurants = defaultdict(list)
+    for product_id, restaurant_id, restaurant_name in menu_items:
+        product_restaurants[product_id].append({
+            'id': restaurant_id,
+            'name': restaurant_name,
+        })
+    return product_restaurants
+
+
+def serialize_product(product, restaurants, fields=PRODUCT_FIELDS):
+    return {
+        field: PRODUCT_SERIALIZERS[field](product, restaurants)
+        for field in fields
+    }
+
+
+def get_products_page(fields=PRODUCT_FIELDS, category_id=None, special=None,
+                      restaurant_id=None, cursor=None,
+                      limit=PRODUCTS_PAGE_SIZE):
+    products = Product.objects.available()
+    if category_id is not None:
+        products = products.filter(category_id=category_id)
+    if special is not None:
+        products = products.filter(special_status=special)
+    if restaurant_id is not None:
+        products = products.filter(
+            menu_items__restaurant_id=restaurant_id,
+            menu_items__availability=True,
+        )
+    if cursor is not None:
+        products = products.filter(id__gt=cursor)
+
+    columns = [
+        column for field in fields for column in PRODUCT_COLUMNS[field]
+    ]
+    if 'category' in fields:
+        products = products.select_related('category')
+    products = list(products.only('id', *columns).order_by('id')[:limit + 1])
+
+    next_cursor = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_cursor = products[-1].id
+
+    restaurants = {}
+    if 'restaurants' in fields:
+        restaurants = get_product_restaurants(
+            [product.id for product in products]
+        )
+    return [
+        serialize_product(product, restaurants, fields)
+        for product in products
+    ], next_cursor
+
+
+def _build_product_catalog():
+    products = Product.objects.select_related('category').available()
+    restaurants = get_product_restaurants()
+    content = dump_json([
+        serialize_product(product, restaurants) for product in products
+    ])
+    etag = hashlib.md5(content).hexdigest()
+    return content, etag
+
+
+def get_product_catalog():
+    catalog = cache.get(PRODUCT_CATALOG_CACHE_KEY)
+    if catalog is None:
+        catalog = _build_product_catalog()
+        cache.set(
+            PRODUCT_CATALOG_CACHE_KEY,
+            catalog,
+            settings.PRODUCT_CATALOG_CACHE_TIMEOUT
+        )
+    return catalog
+
+
+def invalidate_product_catalog():
+    cache.delete(PRODUCT_CATALOG_CACHE_KEY)
+
+
+def refresh_restaurant_menus(restaurant_ids):
+    restaurants = Restaurant.objects.in_bulk(set(restaurant_ids))
+    menu_items = RestaurantMenuItem.objects \
+        .filter(restaurant_id__in=restaurants, availability=True) \
+        .select_related('product__category') \
+        .order_by('product_id')
+    restaurant_products = defaultdict(list)
+    for menu_item in menu_items:
+        restaurant_products[menu_item.restaurant_id].append(menu_item.product)
+
+    snapshots = {
+        snapshot.restaurant_id: snapshot
+        for snapshot in RestaurantMenuSnapshot.objects.filter(
+            restaurant_id__in=restaurants
+        )
+    }
+    new_snapshots = []
+    for restaurant_id, restaurant in restaurants.items():
+        content = dump_json({
+            'restaurant': {
+                'id': restaurant.id,
+                'name': restaurant.name,
+            },
+            'products': [
+                serialize_product(product, {}, MENU_PRODUCT_FIELDS)
+                for product in restaurant_products[restaurant_id]
+            ],
+        })
+        snapshot = snapshots.get(restaurant_id)
+        if not snapshot:
+            snapshot = RestaurantMenuSnapshot(restaurant=restaurant)
+            new_snapshots.append(snapshot)
+        snapshot.content = content.decode()
+        snapshot.etag = hashlib.md5(content).hexdigest()
+        snapshot.updated_at = timezone.now()
+
+    RestaurantMenuSnapshot.objects.bulk_update(
+        snapshots.values(),
+        ['content', 'etag', 'updated_at']
+    )
+    RestaurantMenuSnapshot.objects.bulk_create(
+        new_snapshots,
+        ignore_conflicts=True
+    )
+    return {
+        snapshot.restaurant_id: (snapshot.content, snapshot.etag)
+        for snapshot in [*snapshots.values(), *new_snapshots]
+    }
+
+
+def schedule_restaurant_menus_refresh(restaurant_ids):
+    restaurant_ids = set(restaurant_ids)
+    if restaurant_ids:
+        transaction.on_commit(
+            lambda: refresh_restaurant_menus(restaurant_ids)
+        )
+
+
+def get_restaurant_menu(restaurant_id):
+    snapshot = RestaurantMenuSnapshot.objects \
+        .filter(restaurant_id=restaurant_id) \
+        .values_list('content', 'etag') \
+        .first()
+    if snapshot is None:
+        snapshot = refresh_restaurant_menus([restaurant_id]) \
+            .get(restaurant_id)
+    return snapshot
+
+
+def _build_banners(now):
+    banners = Banner.objects.active(now)
+    content = dump_json([
+        {
+            'title': banner.title,
+            'src': banner.image.url,
+            'text': banner.text,
+        }
+        for banner in banners
+    ])
+
+    upcoming_changes = Banner.objects.filter(is_active=True).aggregate(
+        next_start=Min('active_from', filter=Q(active_from__gt=now)),
+        next_end=Min('active_until', filter=Q(active_until__gt=now)),
+    )
+    valid_until = min(
+        (moment for moment in upcoming_changes.values() if moment),
+        default=None
+    )
+    fallback_valid_until = now + timedelta(seconds=BANNERS_CACHE_LIFETIME)
+    if valid_until is None or valid_until > fallback_valid_until:
+        valid_until = fallback_valid_until
+    return {
+        'content': content,
+        'etag': hashlib.md5(content).hexdigest(),
+        'valid_until': valid_until,
+    }
+
+
+def get_banners():
+    now = timezone.now()
+    version = cache.get_or_set(BANNERS_VERSION_CACHE_KEY, 0, None)
+    banners = banners_cache.get('banners')
+    is_expired = banners and banners['valid_until'] <= now
+    if not banners or banners['version'] != version or is_expired:
+        banners = {**_build_banners(now), 'version': version}
+        banners_cache['banners'] = banners
+    return banners['content'], banners['etag']
+
+
+def invalidate_banners():
+    try:
+        cache.incr(BANNERS_VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(BANNERS_VERSION_CACHE_KEY, 1, None)
+    banners_cache.clear()
+
+
+@transaction.atomic
+def update_menu_availability(changes):
+    changes = {
+        (restaurant_id, product_id): availability
+        for restaurant_id, product_id, availability in changes
+    }
+    restaurant_ids = {restaurant_id for restaurant_id, _ in changes}
+    product_ids = {product_id for _, product_id in changes}
+
+    unknown_restaurant_ids = restaurant_ids - set(
+        Restaurant.objects.filter(id__in=restaurant_ids)
+        .values_list('id', flat=True)
+    )
+    unknown_product_ids = product_ids - set(
+        Product.objects.filter(id__in=product_ids).values_list('id', flat=True)
+    )
+    if unknown_restaurant_ids or unknown_product_ids:
+        raise ValueError(
+            f'Неизвестные рестораны {sorted(unknown_restaurant_ids)} '
+            f'или товары {sorted(unknown_product_ids)}'
+        )
+
+    menu_items = RestaurantMenuItem.objects.select_for_update().filter(
+        restaurant_id__in=restaurant_ids,
+        product_id__in=product_ids
+    )
+    changed_items = []
+    for menu_item in menu_items:
+        key = (menu_item.restaurant_id, menu_item.product_id)
+        if key not in changes:
+            continue
+        availability = changes.pop(key)
+        if menu_item.availability != availability:
+            menu_item.availability = availability
+            changed_items.append(menu_item)
+
+    new_items = [
+        RestaurantMenuItem(
+            restaurant_id=restaurant_id,
+            product_id=product_id,
+            availability=availability
+        )
+        for (restaurant_id, product_id), availability in changes.items()
+    ]
+    RestaurantMenuItem.objects.bulk_update(changed_items, ['availability'])
+    RestaurantMenuItem.objects.bulk_create(new_items)
+
+    if changed_items or new_items:
+        transaction.on_commit(invalidate_product_catalog)
+        schedule_restaurant_menus_refresh(
+            menu_item.restaurant_id
+            for menu_item in [*changed_items, *new_items]
+        )
+    return len(changed_items) + len(new_items)
@@ -0,0 +1,52 @@
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from .models import Product, ProductCategory, Restaurant, \
+    RestaurantMenuItem, Banner
+from .services import invalidate_product_catalog, invalidate_banners, \
+    schedule_restaurant_menus_refresh
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductCategory)
+@receiver(post_delete, sender=ProductCategory)
+@receiver(post_save, sender=Restaurant)
+@receiver(post_delete, sender=Restaurant)
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_product_catalog()
+
+
+@receiver(post_save, sender=RestaurantMenuItem)
+@receiver(post_delete, sender=RestaurantMenuItem)
+def refresh_menu_on_item_change(sender, instance, **kwargs):
+    schedule_restaurant_menus_refresh([instance.restaurant_id])
+
+
+@receiver(post_save, sender=Restaurant)
+def refresh_menu_on_restaurant_change(sender, instance, **kwargs):
+    schedule_restaurant_menus_refresh([instance.id])
+
+
+@receiver(post_save, sender=Product)
+def refresh_menus_on_product_change(sender, instance, **kwargs):
+    schedule_restaurant_menus_refresh(
+        instance.menu_items.values_list('restaurant_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=ProductCategory)
+@receiver(pre_delete, sender=ProductCategory)
+def refresh_menus_on_category_change(sender, instance, **kwargs):
+    schedule_restaurant_menus_refresh(
+        RestaurantMenuItem.objects.filter(product__category=instance)
+        .values_list('restaurant_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def invalidate_banners_on_change(sender, **kwargs):
+    invalidate_banners()
@@ -0,0 +1,189 @@
+import json
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection, DatabaseError
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .management.commands.explain_products_catalog import has_full_menu_scan
+from .models import Product, ProductCategory, Restaurant, \
+    RestaurantMenuItem, Order, ItemsInOrder
+from .services import get_product_catalog, get_products_page, PRODUCT_FIELDS
+
+
+class AvailableProductsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = ProductCategory.objects.create(name='Бургеры')
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Бургер {number}',
+                category=category,
+                price=100,
+                image='burger.jpg',
+            )
+            for number in range(30)
+        ])
+        restaurants = Restaurant.objects.bulk_create([
+            Restaurant(name=f'Star Burger {number}')
+            for number in range(5)
+        ])
+        if not connection.features.can_return_rows_from_bulk_insert:
+            products = list(Product.objects.order_by('id'))
+            restaurants = list(Restaurant.objects.order_by('id'))
+
+        RestaurantMenuItem.objects.bulk_create([
+            RestaurantMenuItem(
+                restaurant=restaurant,
+                product=product,
+                availability=number % 3 == 0,
+            )
+            for restaurant in restaurants
+            for number, product in enumerate(products)
+        ])
+        cls.available_ids = {
+            product.id for number, product in enumerate(products)
+            if number % 3 == 0
+        }
+
+    def setUp(self):
+        cache.clear()
+
+    def test_available_products_are_unique(self):
+        with self.assertNumQueries(1):
+            product_ids = [product.id for product in Product.objects.available()]
+
+        self.assertEqual(len(product_ids), len(set(product_ids)))
+        self.assertEqual(set(product_ids), self.available_ids)
+
+    def test_available_uses_menu_index(self):
+        plan = Product.objects.available().explain()
+
+        self.assertFalse(has_full_menu_scan(plan), plan)
+
+    def test_products_page_queries(self):
+        with self.assertNumQueries(2):
+            products, _ = get_products_page(PRODUCT_FIELDS, limit=5)
+        self.assertEqual(len(products), 5)
+
+        with self.assertNumQueries(1):
+            get_products_page(['id', 'name'], limit=5)
+
+    def test_product_catalog_queries(self):
+        with self.assertNumQueries(2):
+            get_product_catalog()
+        with self.assertNumQueries(0):
+            get_product_catalog()
+
+
+class OrdersBatchTest(TestCase):
+    url = '/api/orders/batch/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(
+            name='Бургер',
+            price=100,
+            image='burger.jpg',
+        )
+        partner = User.objects.create_user('partner')
+        partner.user_permissions.add(
+            Permission.objects.get(codename='add_order')
+        )
+        cls.token = Token.objects.create(user=partner)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        patcher = mock.patch('foodcartapp.views.geocode_in_background')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_order(self, quantity=1):
+        return {
+            'firstname': 'Иван',
+            'lastname': 'Петров',
+            'phonenumber': '+79991234567',
+            'address': 'Москва, Тверская 1',
+            'products': [{'product': self.product.id, 'quantity': quantity}],
+        }
+
+    def post(self, orders):
+        return self.client.post(
+            self.url,
+            json.dumps(orders),
+            content_type='application/json'
+        )
+
+    def test_requires_partner_token(self):
+        self.client.credentials()
+        response = self.post([self.make_order()])
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(Order.objects.exists())
+
+    def test_requires_add_order_permission(self):
+        token = Token.objects.create(user=User.objects.create_user('guest'))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        response = self.post([self.make_order()])
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(ORDERS_BATCH_MAX_SIZE=2)
+    def test_rejects_too_large_batch(self):
+        response = self.post([self.make_order()] * 3)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_reports_invalid_orders_separately(self):
+        response = self.post([
+            self.make_order(),
+            self.make_order(quantity='много'),
+            self.make_order(quantity=-1),
+            'заказ',
+            self.make_order(quantity='2'),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertEqual(
+            ['id' in result for result in results],
+            [True, False, False, False, True]
+        )
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(
+            Order.objects.get(id=results[4]['id']).total_price,
+            200
+        )
+
+    def test_database_error_fails_only_affected_orders(self):
+        bulk_create = ItemsInOrder.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(items, *args, **kwargs):
+            calls.append(items)
+            if len(calls) in {1, 3}:
+                raise DatabaseError('insert failed')
+            return bulk_create(items, *args, **kwargs)
+
+        with mock.patch.object(
+            ItemsInOrder.objects,
+            'bulk_create',
+            failing_bulk_create
+        ):
+            response = self.post([self.make_order()] * 3)
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()
+        self.assertIn('id', results[0])
+        self.assertIn('errors', results[1])
+        self.assertIn('id', results[2])
+        self.assertEqual(
+            set(Order.objects.values_list('id', flat=True)),
+            {results[0]['id'], results[2]['id']}
+        )
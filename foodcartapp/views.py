@@ -1,15 +1,69 @@
-from django.http import JsonResponse
-from django.templatetags.static import static
-from django.db import transaction
-from rest_framework.serializers import ValidationError, ModelSerializer, ListField
-from rest_framework.decorators import api_view
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse, Http404
+from django.db import transaction, connection, DatabaseError
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from rest_framework.serializers import ValidationError, ModelSerializer, \
+    Serializer, IntegerField
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import api_view, parser_classes, \
+    renderer_classes, authentication_classes, permission_classes, \
+    throttle_classes
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.throttling import UserRateThrottle
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 
+from distances.services import geocode_in_background
 from .models import Product, Order, ItemsInOrder
+from .parsers import NDJSONParser
+from .renderers import FastJsonResponse, FastJSONRenderer, dump_json
+from .services import get_product_catalog, get_products_page, get_banners, \
+    get_restaurant_menu, PRODUCT_FIELDS, PRODUCTS_MAX_PAGE_SIZE
+
+
+ORDER_BATCH_CHUNK_SIZE = 500
+ORDER_SAVE_ERROR = 'Не удалось сохранить заказ, повторите его отдельно'
+BANNERS_MAX_AGE = 60
+PRODUCTS_QUERY_PARAMS = {
+    'fields',
+    'category',
+    'special',
+    'restaurant',
+    'cursor',
+    'limit',
+}
+PRODUCTS_SPECIAL_VALUES = {
+    'true': True,
+    '1': True,
+    'false': False,
+    '0': False,
+}
+
+
+class OrdersBatchNDJSONParser(NDJSONParser):
+    max_items = settings.ORDERS_BATCH_MAX_SIZE
+
+
+class CanRegisterOrders(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.has_perm('foodcartapp.add_order')
+
+
+class OrdersBatchThrottle(UserRateThrottle):
+    scope = 'orders_batch'
+
+
+class OrderItemSerializer(Serializer):
+    product = IntegerField()
+    quantity = IntegerField(min_value=1)
 
 
 class OrderSerializer(ModelSerializer):
-    products = ListField(
+    products = OrderItemSerializer(
+        many=True,
         allow_empty=False,
         write_only=True
     )
@@ -20,70 +74,188 @@ class OrderSerializer(ModelSerializer):
                   'phonenumber', 'address']
 
     def validate_products(self, user_request):
-        max_product_id = Product.objects.all().count()
-        for product in user_request:
-            product_id = product['product']
-            if product_id > max_product_id:
+        product_ids = [product['product'] for product in user_request]
+        products = self.context.get('products')
+        if products is None:
+            products = Product.objects.in_bulk(product_ids)
+        for product_id in product_ids:
+            if product_id not in products:
                 raise ValidationError(
                     f'products: Недопустимый первичный ключ {product_id}'
                 )
-        return user_request
+        return [
+            {**product, 'product': products[product['product']]}
+            for product in user_request
+        ]
+
+
+def _make_conditional_response(request, content, etag):
+    response = get_conditional_response(request, etag=quote_etag(etag))
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = quote_etag(etag)
+    return response
+
+
+def _parse_id(value, name):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'Ожидается целое число'})
+
+
+def _parse_products_query(query):
+    params = {}
+    if 'fields' in query:
+        fields = [field for field in query['fields'].split(',') if field]
+        unknown_fields = set(fields) - set(PRODUCT_FIELDS)
+        if not fields or unknown_fields:
+            raise ValidationError({
+                'fields': f'Допустимые поля: {", ".join(PRODUCT_FIELDS)}'
+            })
+        params['fields'] = fields
+    if 'category' in query:
+        params['category_id'] = _parse_id(query['category'], 'category')
+    if 'special' in query:
+        if query['special'] not in PRODUCTS_SPECIAL_VALUES:
+            raise ValidationError({'special': 'Ожидается true или false'})
+        params['special'] = PRODUCTS_SPECIAL_VALUES[query['special']]
+    if 'restaurant' in query:
+        params['restaurant_id'] = _parse_id(query['restaurant'], 'restaurant')
+    if 'cursor' in query:
+        params['cursor'] = _parse_id(query['cursor'], 'cursor')
+    if 'limit' in query:
+        limit = _parse_id(query['limit'], 'limit')
+        if not 0 < limit <= PRODUCTS_MAX_PAGE_SIZE:
+            raise ValidationError({
+                'limit': f'Ожидается число от 1 до {PRODUCTS_MAX_PAGE_SIZE}'
+            })
+        params['limit'] = limit
+    return params
 
 
 def banners_list_api(request):
-    # FIXME move data to db?
-    return JsonResponse([
-        {
-            'title': 'Burger',
-            'src': static('burger.jpg'),
-            'text': 'Tasty Burger at your door step',
-        },
-        {
-            'title': 'Spices',
-            'src': static('food.jpg'),
-            'text': 'All Cuisines',
-        },
-        {
-            'title': 'New York',
-            'src': static('tasty.jpg'),
-            'text': 'Food is incomplete without a tasty dessert',
-        }
-    ], safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+    banners, etag = get_banners()
+    response = _make_conditional_response(request, banners, etag)
+    patch_cache_control(response, public=True, max_age=BANNERS_MAX_AGE)
+    return response
 
 
 def product_list_api(request):
-    products = Product.objects.select_related('category').available()
-
-    dumped_products = []
-    for product in products:
-        dumped_product = {
-            'id': product.id,
-            'name': product.name,
-            'price': product.price,
-            'special_status': product.special_status,
-            'description': product.description,
-            'category': {
-                'id': product.category.id,
-                'name': product.category.name,
-            } if product.category else None,
-            'image': product.image.url,
-            'restaurant': {
-                'id': product.id,
-                'name': product.name,
+    if PRODUCTS_QUERY_PARAMS.isdisjoint(request.GET):
+        catalog, etag = get_product_catalog()
+        return _make_conditional_response(request, catalog, etag)
+
+    try:
+        params = _parse_products_query(request.GET)
+    except ValidationError as error:
+        return FastJsonResponse(error.detail, status=400)
+
+    products, next_cursor = get_products_page(**params)
+    next_url = None
+    if next_cursor is not None:
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'?{query.urlencode()}')
+
+    content = dump_json({'results': products, 'next': next_url})
+    return _make_conditional_response(
+        request,
+        content,
+        hashlib.md5(content).hexdigest()
+    )
+
+
+def restaurant_menu_api(request, restaurant_id):
+    menu = get_restaurant_menu(restaurant_id)
+    if menu is None:
+        raise Http404('Ресторан не найден')
+    content, etag = menu
+    return _make_conditional_response(request, content, etag)
+
+
+def _make_order_items(order, products_in_order):
+    return [
+        ItemsInOrder(
+            order=order,
+            product=product['product'],
+            quantity=product['quantity'],
+            price=product['product'].price
+        )
+        for product in products_in_order
+    ]
+
+
+def _get_total_price(products_in_order):
+    return sum(
+        product['product'].price * product['quantity']
+        for product in products_in_order
+    )
+
+
+def _get_products_snapshot(orders):
+    product_ids = set()
+    for order in orders:
+        if not isinstance(order, dict) \
+                or not isinstance(order.get('products'), list):
+            continue
+        for product in order['products']:
+            if not isinstance(product, dict):
+                continue
+            try:
+                product_ids.add(int(product.get('product')))
+            except (TypeError, ValueError):
+                continue
+    return Product.objects.in_bulk(product_ids)
+
+
+@transaction.atomic
+def _save_orders(serializers):
+    orders = [
+        Order(
+            total_price=_get_total_price(
+                serializer.validated_data['products']
+            ),
+            **{
+                field: serializer.validated_data[field]
+                for field in ['firstname', 'lastname', 'phonenumber', 'address']
             }
-        }
-        dumped_products.append(dumped_product)
-    return JsonResponse(dumped_products, safe=False, json_dumps_params={
-        'ensure_ascii': False,
-        'indent': 4,
-    })
+        )
+        for serializer in serializers
+    ]
+    if connection.features.can_return_rows_from_bulk_insert:
+        Order.objects.bulk_create(orders)
+    else:
+        for order in orders:
+            order.save()
+
+    items_in_order = []
+    for order, serializer in zip(orders, serializers):
+        items_in_order.extend(
+            _make_order_items(order, serializer.validated_data['products'])
+        )
+    ItemsInOrder.objects.bulk_create(items_in_order)
+    return orders
+
+
+def _save_orders_chunk(serializers):
+    try:
+        return _save_orders(serializers)
+    except DatabaseError:
+        pass
+
+    saved_orders = []
+    for serializer in serializers:
+        try:
+            saved_orders.extend(_save_orders([serializer]))
+        except DatabaseError:
+            saved_orders.append(None)
+    return saved_orders
 
 
 @transaction.atomic
 @api_view(['POST'])
+@renderer_classes([FastJSONRenderer])
 def register_order(request):
     order = request.data
     serializer = OrderSerializer(data=order)
@@ -93,26 +265,72 @@ def register_order(request):
         firstname=serializer.validated_data['firstname'],
         lastname=serializer.validated_data['lastname'],
         phonenumber=serializer.validated_data['phonenumber'],
-        address=serializer.validated_data['address']
+        address=serializer.validated_data['address'],
+        total_price=_get_total_price(serializer.validated_data['products'])
     )
 
-    products_in_order = serializer.validated_data['products']
-    items_in_order = []
+    items_in_order = _make_order_items(
+        order,
+        serializer.validated_data['products']
+    )
+    ItemsInOrder.objects.bulk_create(items_in_order)
+    transaction.on_commit(lambda: geocode_in_background([order.address]))
+    server_response = {'id': order.id}
+    server_response.update(serializer.data)
+    return Response(server_response)
 
-    for product in products_in_order:
-        product_id = product['product']
-        product_quantity = product['quantity']
 
-        founded_product = Product.objects.get(id=product_id)
-        item = ItemsInOrder(
-            order=order,
-            product=founded_product,
-            quantity=product_quantity,
-            price=founded_product.price
+@api_view(['POST'])
+@authentication_classes([TokenAuthentication])
+@permission_classes([IsAuthenticated, CanRegisterOrders])
+@throttle_classes([OrdersBatchThrottle])
+@parser_classes([JSONParser, OrdersBatchNDJSONParser])
+@renderer_classes([FastJSONRenderer])
+def register_orders_batch(request):
+    content_length = request.META.get('CONTENT_LENGTH')
+    if content_length and content_length.isdigit() \
+            and int(content_length) > settings.ORDERS_BATCH_MAX_BYTES:
+        return Response(
+            {'detail': 'Слишком большой пакет заказов'},
+            status=413
+        )
+
+    orders = request.data
+    if not isinstance(orders, list):
+        raise ValidationError('Ожидается список заказов')
+    if len(orders) > settings.ORDERS_BATCH_MAX_SIZE:
+        raise ValidationError(
+            f'В одном пакете не больше {settings.ORDERS_BATCH_MAX_SIZE} заказов'
+        )
+
+    products = _get_products_snapshot(orders)
+    server_response = []
+    valid_orders = []
+    for position, order in enumerate(orders):
+        serializer = OrderSerializer(
+            data=order,
+            context={'products': products}
+        )
+        if serializer.is_valid():
+            valid_orders.append((position, serializer))
+            server_response.append(None)
+        else:
+            server_response.append({'errors': serializer.errors})
+
+    for chunk_start in range(0, len(valid_orders), ORDER_BATCH_CHUNK_SIZE):
+        chunk = valid_orders[chunk_start:chunk_start + ORDER_BATCH_CHUNK_SIZE]
+        saved_orders = _save_orders_chunk(
+            [serializer for _, serializer in chunk]
+        )
+        for (position, _), order in zip(chunk, saved_orders):
+            if order is None:
+                server_response[position] = {
+                    'errors': {'non_field_errors': [ORDER_SAVE_ERROR]}
+                }
+            else:
+                server_response[position] = {'id': order.id}
+        geocode_in_background(
+            order.address for order in saved_orders if order is not None
         )
-        items_in_order.append(item)
 
-    ItemsInOrder.objects.bulk_create(items_in_order)
-    server_response = {'id': order.id}
-    server_response.update(serializer.data)
     return Response(server_response)
@@ -0,0 +1,79 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from foodcartapp.models import Order
+
+
+SEQUENTIAL_SCAN_MARKERS = [
+    f'Seq Scan on {Order._meta.db_table}',
+    f'SCAN {Order._meta.db_table}',
+    f'SCAN TABLE {Order._meta.db_table}',
+]
+
+
+def seed_orders(orders_count, not_completed_share, batch_size=10000):
+    for first_order in range(0, orders_count, batch_size):
+        batch_length = min(batch_size, orders_count - first_order)
+        Order.objects.bulk_create([
+            Order(
+                status=random.choice(Order.NOT_COMPLETED_STATUSES)
+                if random.random() < not_completed_share
+                else Order.PROCESSED,
+                firstname='Benchmark',
+                lastname='Benchmark',
+                phonenumber='+79990000000',
+                address='Benchmark',
+            )
+            for _ in range(batch_length)
+        ])
+
+
+def has_sequential_scan(plan):
+    for line in plan.splitlines():
+        if 'USING' in line:
+            continue
+        if any(marker in line for marker in SEQUENTIAL_SCAN_MARKERS):
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает план запроса необработанных заказов для страницы '
+        'менеджера и падает, если по таблице заказов идёт полный проход'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed-orders',
+            type=int,
+            default=0,
+            help='Сколько тестовых заказов добавить перед проверкой. '
+                 'Они удаляются после проверки',
+        )
+        parser.add_argument(
+            '--not-completed-share',
+            type=float,
+            default=0.03,
+            help='Доля необработанных среди тестовых заказов',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            seed_orders(options['seed_orders'], options['not_completed_share'])
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Order._meta.db_table}')
+
+            orders = Order.objects.summary() \
+                .not_completed() \
+                .order_by('-status')
+            plan = orders.explain()
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        if has_sequential_scan(plan):
+            raise CommandError('Заказы выбираются полным проходом по таблице')
+        self.stdout.write(self.style.SUCCESS('Полного прохода по таблице нет'))
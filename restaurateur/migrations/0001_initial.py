@@ -0,0 +1,31 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('foodcartapp', '0062_order_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderRestaurants',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='Ключ заказа и меню')),
+                ('restaurants', models.JSONField(default=list, verbose_name='Рестораны и расстояния до них')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата расчёта')),
+                ('order', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cached_restaurants', to='foodcartapp.order', verbose_name='Заказ')),
+            ],
+            options={
+                'verbose_name': 'рестораны для заказа',
+                'verbose_name_plural': 'рестораны для заказов',
+            },
+        ),
+    ]
@@ -1,3 +1,30 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class OrderRestaurants(models.Model):
+    order = models.OneToOneField(
+        'foodcartapp.Order',
+        verbose_name='Заказ',
+        related_name='cached_restaurants',
+        on_delete=models.CASCADE
+    )
+    key = models.CharField(
+        'Ключ заказа и меню',
+        max_length=64
+    )
+    restaurants = models.JSONField(
+        'Рестораны и расстояния до них',
+        default=list
+    )
+    updated_at = models.DateTimeField(
+        'Дата расчёта',
+        default=timezone.now
+    )
+
+    class Meta:
+        verbose_name = 'рестораны для заказа'
+        verbose_name_plural = 'рестораны для заказов'
+
+    def __str__(self):
+        return f'Рестораны для заказа {self.order_id}'
@@ -0,0 +1,187 @@
+import hashlib
+import time
+
+from django.utils import timezone
+
+from foodcartapp.models import Restaurant
+from foodcartapp.services import get_availability_index, \
+    find_available_restaurants
+from distances.services import get_known_coordinates
+from distances.spatial import SpatialIndex
+
+from .models import OrderRestaurants
+
+
+NEAREST_RESTAURANTS_COUNT = 10
+RESTAURANTS_INDEX_LIFETIME = 10 * 60
+BOARD_CONTEXT_LIFETIME = 30
+
+restaurants_index_cache = {}
+board_context_cache = {}
+
+
+def get_order_restaurants_key(order, restaurants):
+    key_parts = [order.address]
+    key_parts.extend(
+        str(product_id)
+        for product_id in sorted({item.product_id for item in order.items.all()})
+    )
+    key_parts.extend(
+        f'{restaurant_id}:{restaurants[restaurant_id].address}'
+        for restaurant_id in sorted(order.available_restaurant_ids)
+    )
+    return hashlib.sha256('\n'.join(key_parts).encode()).hexdigest()
+
+
+def get_restaurants_index(restaurants):
+    index_key = tuple(
+        (restaurant_id, restaurant.address)
+        for restaurant_id, restaurant in sorted(restaurants.items())
+    )
+    cached_index = restaurants_index_cache.get('index')
+    if cached_index and cached_index['key'] == index_key:
+        index_age = time.monotonic() - cached_index['built_at']
+        if index_age < RESTAURANTS_INDEX_LIFETIME:
+            return cached_index['index'], True
+
+    coordinates = get_known_coordinates(
+        [restaurant.address for restaurant in restaurants.values()]
+    )
+    located_restaurants = [
+        (restaurant_id, coordinates[restaurant.address])
+        for restaurant_id, restaurant in restaurants.items()
+        if None not in coordinates.get(restaurant.address, (None, None))
+    ]
+    restaurants_index = SpatialIndex(
+        [restaurant_id for restaurant_id, _ in located_restaurants],
+        [restaurant_coordinates
+         for _, restaurant_coordinates in located_restaurants]
+    )
+    is_complete = all(
+        restaurant.address in coordinates
+        for restaurant in restaurants.values()
+    )
+    if is_complete:
+        restaurants_index_cache['index'] = {
+            'key': index_key,
+            'built_at': time.monotonic(),
+            'index': restaurants_index,
+        }
+    return restaurants_index, is_complete
+
+
+def locate_restaurants(orders, restaurants):
+    restaurants_index, restaurants_located = get_restaurants_index(restaurants)
+    coordinates = get_known_coordinates([order.address for order in orders])
+
+    order_restaurants = {}
+    for order in orders:
+        if order.address not in coordinates or not restaurants_located:
+            order.distance_pending = True
+            continue
+        order_coordinates = coordinates[order.address]
+        if None in order_coordinates:
+            continue
+
+        nearest_restaurants = restaurants_index.nearest(
+            order_coordinates,
+            NEAREST_RESTAURANTS_COUNT,
+            order.available_restaurant_ids
+        )
+        order_restaurants[order.id] = [
+            [restaurant_id, round(distance, 2)]
+            for restaurant_id, distance in nearest_restaurants
+        ]
+    return order_restaurants
+
+
+def save_order_restaurants(orders, cached_restaurants, order_restaurants):
+    new_entries = []
+    changed_entries = []
+    for order in orders:
+        if order.id not in order_restaurants:
+            continue
+
+        entry = cached_restaurants.get(order.id)
+        if entry is None:
+            entry = OrderRestaurants(order=order)
+            new_entries.append(entry)
+        else:
+            changed_entries.append(entry)
+        entry.key = order.restaurants_key
+        entry.restaurants = order_restaurants[order.id]
+        entry.updated_at = timezone.now()
+        cached_restaurants[order.id] = entry
+
+    OrderRestaurants.objects.bulk_create(new_entries, ignore_conflicts=True)
+    OrderRestaurants.objects.bulk_update(
+        changed_entries,
+        ['key', 'restaurants', 'updated_at']
+    )
+
+
+def get_board_context():
+    board_context = board_context_cache.get('context')
+    if board_context:
+        context_age = time.monotonic() - board_context['built_at']
+        if context_age < BOARD_CONTEXT_LIFETIME:
+            return board_context['restaurants'], \
+                board_context['availability_index']
+
+    restaurants = Restaurant.objects.in_bulk()
+    availability_index = get_availability_index()
+    board_context_cache['context'] = {
+        'restaurants': restaurants,
+        'availability_index': availability_index,
+        'built_at': time.monotonic(),
+    }
+    return restaurants, availability_index
+
+
+def annotate_orders(orders):
+    orders = list(orders)
+    if not orders:
+        return orders
+    restaurants, availability_index = get_board_context()
+
+    for order in orders:
+        order.distance_pending = False
+        order.available_restaurant_ids = find_available_restaurants(
+            availability_index,
+            [item.product_id for item in order.items.all()]
+        )
+        order.available_restaurants = [
+            restaurants[restaurant_id]
+            for restaurant_id in order.available_restaurant_ids
+        ]
+        order.restaurants_key = get_order_restaurants_key(order, restaurants)
+
+    cached_restaurants = {
+        entry.order_id: entry for entry in OrderRestaurants.objects
+        .filter(order__in=[order.id for order in orders])
+    }
+    stale_orders = [
+        order for order in orders
+        if order.available_restaurants
+        and (order.id not in cached_restaurants
+             or cached_restaurants[order.id].key != order.restaurants_key)
+    ]
+    if stale_orders:
+        save_order_restaurants(
+            stale_orders,
+            cached_restaurants,
+            locate_restaurants(stale_orders, restaurants)
+        )
+
+    for order in orders:
+        entry = cached_restaurants.get(order.id)
+        is_fresh = entry is not None and entry.key == order.restaurants_key
+        order.valid_address = not order.available_restaurants or is_fresh \
+            or order.distance_pending
+        order.restaurants = [
+            (restaurants[restaurant_id], distance)
+            for restaurant_id, distance in entry.restaurants
+            if restaurant_id in restaurants
+        ] if is_fresh else []
+
+    return orders
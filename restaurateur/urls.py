@@ -9,11 +9,23 @@ urlpatterns = [
     path('', lambda request: redirect('restaurateur:ProductsView')),
 
     path('products/', views.view_products, name="ProductsView"),
+    path(
+        'products/availability/',
+        views.update_products_availability,
+        name="update_products_availability"
+    ),
 
     path('restaurants/', views.view_restaurants, name="RestaurantView"),
+    path(
+        'geocoder/stats/',
+        views.view_geocoder_stats,
+        name="geocoder_stats"
+    ),
 
     # TODO заглушка для нереализованного функционала
     path('orders/', views.view_orders, name="view_orders"),
+    path('orders/stream/', views.stream_orders, name="stream_orders"),
+    path('orders/export/', views.export_orders, name="export_orders"),
 
     path('login/', views.LoginView.as_view(), name="login"),
     path('logout/', views.LogoutView.as_view(), name="logout"),
@@ -1,19 +1,41 @@
+import json
+import time
+from datetime import timedelta
+from urllib.parse import urlencode
+
 from django import forms
 from django.shortcuts import redirect, render
 from django.views import View
 from django.urls import reverse_lazy
 from django.contrib.auth.decorators import user_passes_test
+from django.core.paginator import Paginator
+from django.views.decorators.http import require_POST
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import views as auth_views
-from geopy import distance
+from django.http import StreamingHttpResponse, HttpResponseBadRequest, \
+    JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+import numpy as np
 
-from foodcartapp.models import Product, Restaurant, Order, RestaurantMenuItem
-from distances.models import Place
-from distances.services import get_address_coordinates
+from foodcartapp.exports import EXPORT_FORMATS, get_export_rows
+from foodcartapp.models import Product, Restaurant, Order, \
+    RestaurantMenuItem
+from foodcartapp.services import update_menu_availability
+from distances.services import get_geocoder_stats
+from .services import annotate_orders
 
 from django.db import connection
 
 
+PRODUCTS_PER_PAGE = 50
+ORDERS_STREAM_POLL_INTERVAL = 2
+ORDERS_STREAM_LIFETIME = 300
+ORDERS_STREAM_OVERLAP = timedelta(seconds=60)
+
+
 class Login(forms.Form):
     username = forms.CharField(
         label='Логин', max_length=75, required=True,
@@ -68,26 +90,92 @@ def is_manager(user):
 
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_products(request):
-    restaurants = list(Restaurant.objects.order_by('name'))
-    products = list(Product.objects.prefetch_related('menu_items'))
-
-    products_with_restaurant_availability = []
-    for product in products:
-        availability = {item.restaurant_id: item.availability for item in
-                        product.menu_items.all()}
-        ordered_availability = [availability.get(restaurant.id, False) for
-                                restaurant in restaurants]
-
-        products_with_restaurant_availability.append(
-            (product, ordered_availability)
-        )
+    all_restaurants = list(Restaurant.objects.order_by('name'))
+    selected_restaurant_ids = {
+        int(restaurant_id)
+        for restaurant_id in request.GET.getlist('restaurant')
+        if restaurant_id.isdigit()
+    }
+    restaurants = [
+        restaurant for restaurant in all_restaurants
+        if not selected_restaurant_ids
+        or restaurant.id in selected_restaurant_ids
+    ]
+
+    products_page = Paginator(
+        Product.objects.select_related('category').order_by('name', 'id'),
+        PRODUCTS_PER_PAGE
+    ).get_page(request.GET.get('page'))
+    products = list(products_page)
+
+    product_rows = {product.id: row for row, product in enumerate(products)}
+    restaurant_columns = {
+        restaurant.id: column for column, restaurant in enumerate(restaurants)
+    }
+    available_menu_items = np.array(
+        RestaurantMenuItem.objects.filter(
+            product_id__in=product_rows,
+            restaurant_id__in=restaurant_columns,
+            availability=True
+        ).values_list('product_id', 'restaurant_id'),
+        dtype=int
+    ).reshape(-1, 2)
+
+    availability_matrix = np.zeros(
+        (len(products), len(restaurants)),
+        dtype=bool
+    )
+    availability_matrix[
+        [product_rows[product_id] for product_id in available_menu_items[:, 0]],
+        [restaurant_columns[restaurant_id]
+         for restaurant_id in available_menu_items[:, 1]]
+    ] = True
+
+    products_with_restaurant_availability = [
+        (product, list(zip(restaurants, product_availability.tolist())))
+        for product, product_availability in zip(products, availability_matrix)
+    ]
 
     return render(request, template_name="products_list.html", context={
         'products_with_restaurant_availability': products_with_restaurant_availability,
         'restaurants': restaurants,
+        'all_restaurants': all_restaurants,
+        'selected_restaurant_ids': selected_restaurant_ids,
+        'products_page': products_page,
+        'filter_query': urlencode([
+            ('restaurant', restaurant_id)
+            for restaurant_id in sorted(selected_restaurant_ids)
+        ]),
     })
 
 
+@require_POST
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def update_products_availability(request):
+    try:
+        changes = [
+            (int(change['restaurant']), int(change['product']),
+             change['availability'])
+            for change in json.loads(request.body)
+        ]
+        if not all(isinstance(change[2], bool) for change in changes):
+            raise TypeError('availability должно быть true или false')
+        updated_items_count = update_menu_availability(changes)
+    except (ValueError, KeyError, TypeError) as error:
+        return JsonResponse(
+            {'error': str(error)},
+            status=400,
+            json_dumps_params={'ensure_ascii': False}
+        )
+
+    return JsonResponse({'updated': updated_items_count})
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_geocoder_stats(request):
+    return JsonResponse(get_geocoder_stats())
+
+
 @user_passes_test(is_manager, login_url='restaurateur:login')
 def view_restaurants(request):
     return render(request, template_name="restaurants_list.html", context={
@@ -95,72 +183,127 @@ def view_restaurants(request):
     })
 
 
-@user_passes_test(is_manager, login_url='restaurateur:login')
-def view_orders(request):
-    orders = Order.objects.summary() \
-        .filter(status__in=['NP', 'IP', 'ID']) \
-        .prefetch_related('items__product') \
-        .prefetch_related('cooking_restaurant') \
-        .order_by('-status')
-    menu_items = RestaurantMenuItem.objects.all() \
-        .select_related('product').select_related('restaurant') \
-        .exclude(availability=False)
-    not_completed_order_addresses = [order.address for order in orders]
-    not_completed_order_addresses.extend(
-        [restaurant.address for restaurant in Restaurant.objects.all()]
-    )
+def get_board_orders():
+    return Order.objects.summary() \
+        .prefetch_related('items') \
+        .prefetch_related('cooking_restaurant')
 
-    places = {place.address: {
-        'lat': place.latitude,
-        'lon': place.longitude
-    } for place in Place.objects.filter(
-        address__in=set(not_completed_order_addresses)
-    )}
-
-    for order in orders:
-        order.restaurants = {}
-        order.valid_address = True
-        order.available_restaurants = set()
-
-        for position_in_order, item in enumerate(order.items.all()):
-            available_restaurants = [
-                restaurant_item.restaurant for restaurant_item in menu_items
-                if item.product.id == restaurant_item.product.id
-            ]
-            if not order.available_restaurants and not position_in_order:
-                order.available_restaurants = set(available_restaurants)
-                continue
-
-            order.available_restaurants &= set(available_restaurants)
-
-        for restaurant in order.available_restaurants:
-            if restaurant.address not in places.keys():
-                restaurant_coordinates = get_address_coordinates(
-                    restaurant.address
-                )
-            else:
-                restaurant_coordinates = places[restaurant.address]['lat'], \
-                                         places[restaurant.address]['lon']
-            if order.address not in places.keys():
-                order_coordinates = get_address_coordinates(order.address)
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id else []
+    lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in str(data).splitlines())
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_order_changes(since, board_url):
+    started_at = time.monotonic()
+    sent_versions = {}
+    while time.monotonic() - started_at < ORDERS_STREAM_LIFETIME:
+        window_start = since - ORDERS_STREAM_OVERLAP
+        changed_orders = [
+            order for order in get_board_orders()
+            .filter(updated_at__gt=window_start)
+            .order_by('updated_at')
+            if sent_versions.get(order.id) != order.updated_at
+        ]
+        not_completed_orders = [
+            order for order in changed_orders
+            if order.status in Order.NOT_COMPLETED_STATUSES
+        ]
+        if not_completed_orders:
+            annotate_orders(not_completed_orders)
+        for order in changed_orders:
+            sent_versions[order.id] = order.updated_at
+            since = max(since, order.updated_at)
+            event_id = since.isoformat()
+            if order in not_completed_orders:
+                row = render_to_string('order_row.html', context={
+                    'item': order,
+                    'board_url': board_url,
+                })
+                yield format_event('order', row, event_id)
             else:
-                order_coordinates = places[order.address]['lat'], \
-                                    places[order.address]['lon']
+                yield format_event('remove', order.id, event_id)
 
-            if not order_coordinates or order_coordinates == (None, None):
-                order.valid_address = False
-                break
+        sent_versions = {
+            order_id: updated_at
+            for order_id, updated_at in sent_versions.items()
+            if updated_at > window_start
+        }
+        if not changed_orders:
+            yield ': keep-alive\n\n'
+        time.sleep(ORDERS_STREAM_POLL_INTERVAL)
 
-            order.restaurants[restaurant] = round(
-                distance.distance(restaurant_coordinates, order_coordinates)
-                .km, 2)
-        order.restaurants = \
-            dict(sorted(order.restaurants.items(), key=lambda item: item[1]))
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def view_orders(request):
+    since = timezone.now()
+    orders = annotate_orders(
+        get_board_orders().not_completed().order_by('-status')
+    )
 
     context = {
         'order_items': orders,
+        'since': since.isoformat(),
+        'board_url': request.get_full_path(),
     }
     return render(
         request,
         template_name='order_items.html',
         context=context)
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def stream_orders(request):
+    since_value = request.headers.get('Last-Event-ID') \
+        or request.GET.get('since')
+    since = timezone.now()
+    if since_value:
+        try:
+            since = parse_datetime(since_value)
+        except ValueError:
+            since = None
+        if not since:
+            return HttpResponseBadRequest(f'Некорректная дата {since_value}')
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+
+    response = StreamingHttpResponse(
+        stream_order_changes(since, reverse('restaurateur:view_orders')),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@user_passes_test(is_manager, login_url='restaurateur:login')
+def export_orders(request):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest('Неизвестный формат выгрузки')
+
+    dates = {}
+    for param in ['date_from', 'date_to']:
+        value = request.GET.get(param)
+        try:
+            dates[param] = parse_date(value) if value else None
+        except ValueError:
+            dates[param] = None
+        if value and not dates[param]:
+            return HttpResponseBadRequest(f'Некорректная дата {value}')
+
+    render_rows, content_type = EXPORT_FORMATS[export_format]
+    rows = get_export_rows(
+        date_from=dates['date_from'],
+        date_to=dates['date_to'],
+        statuses=request.GET.getlist('status'),
+    )
+    response = StreamingHttpResponse(
+        render_rows(rows),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = \
+        f'attachment; filename="orders.{export_format}"'
+    return response
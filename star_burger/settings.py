@@ -8,7 +8,15 @@ from environs import Env
 env = Env()
 env.read_env()
 
-YANDEX_API_KEY = env.str('YANDEX_API_KEY')
+YANDEX_API_KEY = env.str('YANDEX_API_KEY', '')
+GEOCODER_BACKEND = env.str(
+    'GEOCODER_BACKEND',
+    'distances.geocoders.YandexGeocoder'
+)
+GEOCODER_OPTIONS = env.json('GEOCODER_OPTIONS', '{}')
+GEOCODER_MAX_WORKERS = env.int('GEOCODER_MAX_WORKERS', 8)
+GEOCODER_CACHE_TTL = env.int('GEOCODER_CACHE_TTL', 30 * 24 * 60 * 60)
+GEOCODER_NEGATIVE_CACHE_TTL = env.int('GEOCODER_NEGATIVE_CACHE_TTL', 60 * 60)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
@@ -31,6 +39,7 @@ INSTALLED_APPS = [
     'debug_toolbar',
     'phonenumber_field',
     'rest_framework',
+    'rest_framework.authtoken',
 
     'distances',
 ]
@@ -95,6 +104,33 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
 
+CACHES = {
+    'default': {
+        'BACKEND': env.str(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': env.str('CACHE_LOCATION', ''),
+    }
+}
+
+PER_PROCESS_CACHE_BACKENDS = [
+    'django.core.cache.backends.locmem.LocMemCache',
+]
+PRODUCT_CATALOG_CACHE_TIMEOUT = env.int(
+    'PRODUCT_CATALOG_CACHE_TIMEOUT',
+    60 if CACHES['default']['BACKEND'] in PER_PROCESS_CACHE_BACKENDS else 3600
+)
+
+ORDERS_BATCH_MAX_SIZE = env.int('ORDERS_BATCH_MAX_SIZE', 1000)
+ORDERS_BATCH_MAX_BYTES = env.int('ORDERS_BATCH_MAX_BYTES', 2 * 1024 * 1024)
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_RATES': {
+        'orders_batch': env.str('ORDERS_BATCH_THROTTLE_RATE', '60/hour'),
+    },
+}
+
 DATABASES = {
     'default': dj_database_url.parse(env('DJ_DATABASE_URL'), conn_max_age=600)
 }